@@ -1,7 +1,18 @@
 import uvicorn
 from src.main import app
+from src.core import config
 
 if __name__ == "__main__":
     # The string "src.main:app" tells uvicorn where to find the FastAPI instance.
     # Uvicorn will handle reloading when you make changes to any file.
-    uvicorn.run("src.main:app", host="0.0.0.0", port=5000, reload=False)
+    # uvloop + httptools replace the stock asyncio loop and h11 parser.
+    uvicorn.run(
+        "src.main:app",
+        host="0.0.0.0",
+        port=5000,
+        reload=False,
+        workers=config.WORKERS,
+        loop="uvloop",
+        http="httptools",
+        ws="websockets",
+    )
@@ -1,14 +1,38 @@
-
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
+
+MARKER = b"<<<<<<<"
+CHUNK_SIZE = 64 * 1024
+
+
+def has_conflict_marker(path):
+    # Scan raw bytes in fixed-size chunks and stop at the first marker;
+    # the overlap catches a marker split across two reads.
+    overlap = len(MARKER) - 1
+    with open(path, 'rb') as f:
+        prev = b""
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                return False
+            if MARKER in prev[-overlap:] + chunk:
+                return True
+            prev = chunk
+
+
+def is_clean(path):
+    if not os.path.exists(path):
+        return False
+    try:
+        return not has_conflict_marker(path)
+    except Exception:
+        return False
+
 
-for line in sys.stdin:
-    path = line.strip()
-    if not path: continue
-    if os.path.exists(path):
-        try:
-            with open(path, 'r', errors='ignore') as f:
-                if '<<<<<<<' not in f.read():
-                    print(path)
-        except Exception:
-            pass
+paths = [line.strip() for line in sys.stdin if line.strip()]
+# File reads release the GIL, so threads overlap the I/O; map() keeps input order.
+with ThreadPoolExecutor(max_workers=32) as ex:
+    for path, clean in zip(paths, ex.map(is_clean, paths)):
+        if clean:
+            print(path)
@@ -1,17 +1,18 @@
 import asyncio
-import json
-from typing import Optional, Dict, Tuple
+from typing import AsyncIterator, FrozenSet, List, Optional, Dict, Tuple
 
-from urllib.parse import urlsplit, urlunsplit,urlencode
+from urllib.parse import parse_qsl, urlsplit, urlunsplit, urlencode
 import contextlib
 import httpx
+import orjson
 import websockets
 from websockets.exceptions import ConnectionClosed
-from bs4 import BeautifulSoup
-from fastapi import APIRouter, Request, HTTPException, WebSocket, WebSocketDisconnect
-from fastapi.responses import Response, JSONResponse
+from fastapi import APIRouter, Request, HTTPException, WebSocket
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.datastructures import Headers, QueryParams
+from starlette.websockets import WebSocketState
 from pydantic import BaseModel
-import requests
 from fastapi.responses import HTMLResponse
 from ..core import config
 from ..services import activepieces_service
@@ -23,47 +24,90 @@ import  logging
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# Shared HTTP Clients to prevent connection leaks
+# Shared HTTP Client to prevent connection leaks
 _shared_httpx_client: Optional[httpx.AsyncClient] = None
-_shared_requests_session: Optional[requests.Session] = None
+
+# Keep-alive pool for the upstream; HTTP/2 is negotiated via ALPN when the upstream supports it.
+HTTPX_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0)
+
+
+def _get_httpx_client() -> httpx.AsyncClient:
+    """Return the shared pooled client, creating it on first use."""
+    global _shared_httpx_client
+    if _shared_httpx_client is None or _shared_httpx_client.is_closed:
+        _shared_httpx_client = httpx.AsyncClient(
+            http2=True,
+            timeout=config.TIMEOUT,
+            limits=HTTPX_LIMITS,
+            follow_redirects=True,
+        )
+    return _shared_httpx_client
+
 
 @router.on_event("startup")
 async def startup_event():
-    global _shared_httpx_client, _shared_requests_session
-    _shared_httpx_client = httpx.AsyncClient(timeout=config.TIMEOUT, follow_redirects=True)
-    _shared_requests_session = requests.Session()
+    _get_httpx_client()
 
 @router.on_event("shutdown")
 async def shutdown_event():
-    global _shared_httpx_client, _shared_requests_session
+    global _shared_httpx_client
     if _shared_httpx_client:
         await _shared_httpx_client.aclose()
-    if _shared_requests_session:
-        _shared_requests_session.close()
-
-
-PLAT_SEGMENT_RE = re.compile(
-    r"(?:^|/)v1/platforms/([^/?#]+)",
-    re.IGNORECASE,
-)
-
-# Match .../projects/{pid}/flows/{fid}
-PROJECT_FLOW_PATH_RE = re.compile(
-    r"(?P<prefix>(?:^|/)projects/)(?P<pid>[^/?#]+)/flows/(?P<fid>[^/?#]+)",
+        _shared_httpx_client = None
+
+
+# Match every id-bearing path segment in one scan:
+#   .../v1/platforms/{platform}
+#   .../v1/users/projects/{user_pid}
+#   .../projects/{pid}[/flows/{fid}]
+PATH_ID_RE = re.compile(
+    r"(?:^|/)(?:"
+    r"v1/platforms/(?P<platform>[^/?#]+)"
+    r"|v1/users/projects/(?P<user_pid>[^/?#]+)"
+    r"|projects/(?P<pid>[^/?#]+)(?P<flows>/flows/[^/?#]+)?"
+    r")",
     re.IGNORECASE,
 )
 
-# Match .../projects/{pid}
-PROJECT_SEGMENT_RE = re.compile(
-    r"(?P<prefix>(?:^|/)projects/)(?P<pid>[^/?#]+)",
-    re.IGNORECASE,
-)
 
-# Match .../v1/users/projects/{pid}
-USERS_PROJECT_RE = re.compile(
-    r"(?P<prefix>(?:^|/)v1/users/projects/)(?P<pid>[^/?#]+)",
-    re.IGNORECASE,
-)
+# Request headers that must not be forwarded upstream, as raw ASGI header names
+_HOP_BY_HOP = frozenset({
+    b"connection",
+    b"keep-alive",
+    b"proxy-authenticate",
+    b"proxy-authorization",
+    b"te",
+    b"trailers",
+    b"transfer-encoding",
+    b"upgrade",
+    b"content-length",
+    b"host",
+})
+
+# Response headers dropped when the body is re-emitted decoded, as lower-cased raw names
+_RESP_EXCLUDED = frozenset({b"content-encoding", b"content-length", b"transfer-encoding", b"connection"})
+# Raw streamed bodies stay encoded, so only framing headers are dropped
+_STREAM_RESP_EXCLUDED = frozenset({b"transfer-encoding", b"connection"})
+
+# Decoded chunk size for on-the-fly URL rewriting of streamed text bodies
+REWRITE_CHUNK_SIZE = 64 * 1024
+# Request bodies above this size (or chunked uploads) are streamed upstream instead of buffered
+REQUEST_STREAM_THRESHOLD = 64 * 1024
+
+# Upstream base URL, normalised once; config is read-only after startup
+_AP_BASE = config.AP_BASE_URL.rstrip("/")
+_AP_BASE_PARTS = urlsplit(_AP_BASE)
+_WS_SCHEME = "wss" if _AP_BASE_PARTS.scheme == "https" else "ws"
+_AP_PROXY = config.AP_PROXY_URL.rstrip("/")
+
+# Upstream origin as it appears in response bodies, and the proxy origin it is rewritten to
+_UPSTREAM_ORIGIN_B = _AP_BASE.encode("utf-8")
+_PROXY_ORIGIN_B = _AP_PROXY.encode("utf-8")
+# Nothing to rewrite when either origin is unset or both point at the same place.
+_REWRITE_ORIGINS = bool(_UPSTREAM_ORIGIN_B and _PROXY_ORIGIN_B and _UPSTREAM_ORIGIN_B != _PROXY_ORIGIN_B)
+
+# Match the opening <body ...> tag of an HTML document
+_BODY_OPEN_RE = re.compile(rb"(<body\b[^>]*>)", re.IGNORECASE)
 
 
 class WorkflowPayload(BaseModel):
@@ -74,69 +118,195 @@ class WorkflowPayload(BaseModel):
     projectId: Optional[str] = None
 
 
-def _filtered_outgoing_headers(incoming: Dict[str, str]) -> Dict[str, str]:
-    """Strip hop-by-hop headers; upstream will set length/encoding."""
-    hop_by_hop = {
-        "connection",
-        "keep-alive",
-        "proxy-authenticate",
-        "proxy-authorization",
-        "te",
-        "trailers",
-        "transfer-encoding",
-        "upgrade",
-        "content-length",
-        "host",
-    }
-    return {k: v for k, v in incoming.items() if k.lower() not in hop_by_hop}
-
-def url_rewrite(content, content_type: str, token_to_inject: Optional[str], project_id_to_inject: Optional[str]):
-    upstream_origin = config.AP_BASE_URL
-    proxy_origin = config.AP_PROXY_URL
-
-    if not isinstance(content, str) and not ("text" in content_type or "javascript" in content_type or "json" in content_type):
-        return content
-
-    content_str = None
-    try:
-        content_str = content.decode("utf-8") if isinstance(content, bytes) else content
-    except (UnicodeDecodeError, AttributeError):
-        return content
+def _filtered_outgoing_headers(incoming: Headers) -> Tuple[Dict[bytes, bytes], bytes]:
+    """Strip hop-by-hop headers in one pass over the raw ASGI headers; upstream will set length/encoding.
+
+    Returns the filtered headers and the incoming Host value, both as raw bytes. Keys are
+    lower-cased, so callers must write lower-cased byte keys to override an incoming header.
+    Values stay bytes because httpx would ASCII-encode str values and reject UTF-8 cookies.
+    """
+    headers: Dict[bytes, bytes] = {}
+    host = b""
+    # ASGI header names are already lower-cased bytes
+    for name, value in incoming.raw:
+        if name in _HOP_BY_HOP:
+            if name == b"host":
+                host = value
+            continue
+        headers[name] = value
+    return headers, host
+
+def _merge_query_params(query_params: QueryParams, extra_qs: Optional[List[Tuple[str, str]]]) -> List[Tuple[str, str]]:
+    """Keep the incoming query as ordered pairs so repeated keys survive.
+
+    Pairs from a query string that leaked into the path only fill keys the real query lacks.
+    """
+    q_params = query_params.multi_items()
+    if extra_qs:
+        present = {k for k, _ in q_params}
+        q_params.extend((k, v) for k, v in extra_qs if k not in present)
+    return q_params
+
+
+def _streams_request_body(request: Request) -> bool:
+    """Large or chunked uploads go upstream as they arrive instead of being buffered."""
+    length = request.headers.get("content-length")
+    if length is None:
+        return "chunked" in request.headers.get("transfer-encoding", "").lower()
+    return length.isdigit() and int(length) > REQUEST_STREAM_THRESHOLD
+
+
+def _media_type(resp: httpx.Response) -> str:
+    """Bare, lower-cased media type of an upstream response (parameters dropped)."""
+    return resp.headers.get("content-type", "").split(";", 1)[0].strip().lower()
+
+
+def _is_textual(content_type: str) -> bool:
+    return "text" in content_type or "javascript" in content_type or "json" in content_type
+
+
+def _is_rewritable(content_type: str, token: Optional[str] = None) -> bool:
+    """Only textual bodies can carry upstream URLs or need token injection."""
+    if not _REWRITE_ORIGINS:
+        # No origin swap configured; only the HTML token splice can change the body.
+        return bool(token) and "html" in content_type
+    return _is_textual(content_type)
+
+
+def _upstream_raw_headers(resp: httpx.Response, excluded: FrozenSet[bytes]) -> List[Tuple[bytes, bytes]]:
+    """Copy upstream headers as raw ASGI pairs, keeping repeated ones such as Set-Cookie."""
+    headers = []
+    for name, value in resp.headers.raw:
+        name = name.lower()
+        if name not in excluded:
+            headers.append((name, value))
+    return headers
+
+
+def _stream_response(resp: httpx.Response, content: Optional[AsyncIterator[bytes]] = None) -> StreamingResponse:
+    """Relay an upstream response chunk by chunk instead of buffering the body.
+
+    ``content`` is a decoded body iterator; by default the raw, still-encoded bytes are piped through.
+    """
+    if content is None:
+        content = resp.aiter_raw()
+        excluded = _STREAM_RESP_EXCLUDED
+    else:
+        excluded = _RESP_EXCLUDED
+    response = StreamingResponse(
+        content,
+        status_code=resp.status_code,
+        background=BackgroundTask(resp.aclose),
+    )
+    response.raw_headers.extend(_upstream_raw_headers(resp, excluded))
+    return response
+
+
+def _relay_response(resp: httpx.Response, content: bytes) -> Response:
+    """Build a buffered response carrying the upstream status and headers."""
+    response = Response(content=content, status_code=resp.status_code)
+    response.raw_headers.extend(_upstream_raw_headers(resp, _RESP_EXCLUDED))
+    return response
+
+
+async def _rewrite_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Apply the origin rewrite chunk by chunk, holding back only a possibly split occurrence."""
+    needle, replacement = _UPSTREAM_ORIGIN_B, _PROXY_ORIGIN_B
+    tail = b""
+    async for chunk in chunks:
+        buf = tail + chunk
+        cut = len(buf) - len(needle) + 1
+        if cut <= 0:
+            tail = buf
+            continue
+        # An occurrence starting before the cut would be split; keep it whole for the next round
+        straddle = buf.find(needle, max(cut - len(needle) + 1, 0))
+        if 0 <= straddle < cut:
+            cut = straddle
+        if cut:
+            yield buf[:cut].replace(needle, replacement)
+        tail = buf[cut:]
+    if tail:
+        yield tail.replace(needle, replacement)
+
+
+def _token_script(token_to_inject: str, project_id_to_inject: Optional[str]) -> bytes:
+    token_js = orjson.dumps(token_to_inject)
+    pid_js = orjson.dumps(project_id_to_inject) if project_id_to_inject else b"null"
+    return (
+        b"<script>(function(){try{localStorage.setItem('token'," + token_js
+        + b");if(" + pid_js + b"!==null)localStorage.setItem('projectId'," + pid_js
+        + b");}catch(e){}}());</script>"
+    )
+
+
+def url_rewrite(content: bytes, content_type: str, token_to_inject: Optional[str], project_id_to_inject: Optional[str]) -> bytes:
+    """Inject the auth token into HTML and point upstream URLs at the proxy.
 
+    Callers gate on _is_rewritable() first so binary bodies never reach this function.
+    """
     if "html" in content_type and token_to_inject:
-        # Don't use BS4 if we can just string-replace; BS4 is heavy.
-        if "<body" in content_str:
-            token_js = json.dumps(token_to_inject)
-            pid_js = json.dumps(project_id_to_inject) if project_id_to_inject else "null"
-            script = f"<script>(function(){{try{{localStorage.setItem('token',{token_js});if({pid_js}!==null)localStorage.setItem('projectId',{pid_js});}}catch(e){{}}}}());</script>"
-            content_str = re.sub(r'(<body[^>]*>)', r'\1' + script, content_str, count=1, flags=re.IGNORECASE)
-        else:
-            soup = BeautifulSoup(content_str, "html.parser")
-            body = soup.find("body")
-            if body:
-                token_js = json.dumps(token_to_inject)
-                pid_js = json.dumps(project_id_to_inject) if project_id_to_inject else "null"
-
-                script_content = f"""
-                (function() {{
-                  try {{
-                    localStorage.setItem('token', {token_js});
-                    if ({pid_js} !== null) localStorage.setItem('projectId', {pid_js});
-                  }} catch (e) {{}}
-                }})();
-                """.strip()
-
-                script_tag = soup.new_tag("script")
-                script_tag.string = script_content
-                body.insert(0, script_tag)
-                content_str = str(soup)
-
-    if isinstance(content_str, str) and upstream_origin and proxy_origin:
-        upstream_stripped = upstream_origin.rstrip("/")
-        if upstream_stripped in content_str:
-            content_str = content_str.replace(upstream_stripped, proxy_origin.rstrip("/"))
-
-    return content_str
+        # Splice the script in right after <body ...> on the raw bytes; no DOM build needed.
+        script = _token_script(token_to_inject, project_id_to_inject)
+        content = _BODY_OPEN_RE.sub(lambda m: m.group(1) + script, content, count=1)
+
+    # Origins are ASCII, so the replace runs on the raw bytes without a decode/encode round-trip.
+    if _REWRITE_ORIGINS:
+        content = content.replace(_UPSTREAM_ORIGIN_B, _PROXY_ORIGIN_B)
+
+    return content
+
+
+_LOGOUT_REDIRECT_URL = config.CORS_ORIGINS[0].rstrip("/")
+
+# Only depends on config, so it is rendered and encoded once.
+_LOGOUT_HTML = f"""
+    <script>
+      // Clear Web Storage
+      try {{
+        localStorage.clear();
+        sessionStorage.clear();
+      }} catch (e) {{}}
+
+      // Clear IndexedDB (best-effort)
+      try {{
+        if (indexedDB && indexedDB.databases) {{
+          indexedDB.databases().then(dbs => dbs.forEach(db => db && db.name && indexedDB.deleteDatabase(db.name)));
+        }}
+      }} catch (e) {{}}
+
+      // Clear Cache Storage (best-effort)
+      try {{
+        if (window.caches && caches.keys) {{
+          caches.keys().then(keys => keys.forEach(k => caches.delete(k)));
+        }}
+      }} catch (e) {{}}
+
+      // Unregister service workers (best-effort)
+      try {{
+        navigator.serviceWorker?.getRegistrations?.().then(regs => regs.forEach(r => r.unregister()));
+      }} catch (e) {{}}
+
+      // Redirect back to the host app
+      window.location.replace('{_LOGOUT_REDIRECT_URL}');
+    </script>
+    """.encode("utf-8")
+
+# Expiry attributes must match how the cookies were originally set.
+_LOGOUT_COOKIES = ("token", "ap_project_id", "ap_platform_id", "ap_session_born")
+
+
+def _expired_cookie_headers(**cookie_args) -> List[Tuple[bytes, bytes]]:
+    # Let Starlette format the Set-Cookie values once; they never vary per request.
+    scratch = Response()
+    for name in _LOGOUT_COOKIES:
+        scratch.set_cookie(name, value="", path="/", max_age=0, httponly=True, **cookie_args)
+    return [(k, v) for k, v in scratch.raw_headers if k == b"set-cookie"]
+
+
+_EXPIRE_COOKIES_HTTPS = _expired_cookie_headers(secure=True, samesite="None")
+# Lax allows top-level navigation + same-site XHR
+_EXPIRE_COOKIES_HTTP = _expired_cookie_headers(secure=False, samesite="Lax")
 
 
 def _is_https(request: Request) -> bool:
@@ -168,8 +338,9 @@ async def workflow(payload: WorkflowPayload, request: Request):
             projectId = payload.projectId
 
     if not token:
-        ap_data = await asyncio.to_thread(activepieces_service.sign_in, payload.email, payload.password)
-        db_manager.store_user_data(ap_data)
+        ap_data = await activepieces_service.sign_in(payload.email, payload.password)
+        # psycopg2 blocks, so keep the write off the event loop
+        await asyncio.to_thread(db_manager.store_user_data, ap_data)
         token = ap_data.get("token")
         projectId = ap_data.get("projectId")
 
@@ -180,14 +351,15 @@ async def workflow(payload: WorkflowPayload, request: Request):
     if projectId:
         redirect_params["projectId"] = projectId
 
-    redirect_url_with_token = f"{config.AP_PROXY_URL.rstrip('/')}?{urlencode(redirect_params)}"
+    redirect_url_with_token = f"{_AP_PROXY}?{urlencode(redirect_params)}"
 
-    return JSONResponse(content={
+    # orjson builds the bytes; a plain Response avoids FastAPI's deprecated ORJSONResponse
+    return Response(content=orjson.dumps({
         "success": True,
         "redirectUrl": redirect_url_with_token,
         "token": token,
         "projectId": projectId
-    })
+    }), media_type="application/json")
 
 @router.get("/deleteuser", status_code=204)
 async def delete_user(request: Request):
@@ -208,8 +380,7 @@ async def delete_user(request: Request):
             )
         user_id = payload.get("id")
         project_id=payload.get("projectId")
-        print("#################################################")
-        print(payload)
+        logger.debug("deleteuser token claims: id=%s projectId=%s", user_id, project_id)
         if not user_id:
             logger.error("Activepieces token payload missing 'id': %s", payload)
             raise HTTPException(status_code=400, detail="Token payload missing 'id'")
@@ -219,11 +390,11 @@ async def delete_user(request: Request):
 
     # ----- Call Activepieces delete -----
     try:
-        await asyncio.to_thread(activepieces_service.purge_user, user_id,token)
+        await activepieces_service.purge_user(user_id, token)
         logger.info("Deletion successful for Activepieces user %s", user_id)
-    except requests.HTTPError as e:
-        status = e.response.status_code if e.response is not None else 502
-        body = e.response.text if e.response is not None else str(e)
+    except httpx.HTTPStatusError as e:
+        status = e.response.status_code
+        body = e.response.text
         logger.error(
             "Activepieces deletion failed for user %s: %s %s",
             user_id, status, body,
@@ -232,7 +403,7 @@ async def delete_user(request: Request):
             status_code=status if status >= 400 else 500,
             detail=f"Activepieces deletion failed: {body}",
         )
-    except requests.RequestException as e:
+    except httpx.RequestError as e:
         logger.error("Network error calling Activepieces delete: %s", e)
         raise HTTPException(status_code=502, detail="Error contacting Activepieces API")
 
@@ -248,42 +419,8 @@ async def logout(request: Request):
     client-side state so stale flow routes/IDs aren't reused across users.
     """
 
-    # 2) Build a tiny page that wipes client storage (belt-and-suspenders)
-    redirect_url = config.CORS_ORIGINS[0].rstrip('/')
-
-    html = f"""
-    <script>
-      // Clear Web Storage
-      try {{
-        localStorage.clear();
-        sessionStorage.clear();
-      }} catch (e) {{}}
-
-      // Clear IndexedDB (best-effort)
-      try {{
-        if (indexedDB && indexedDB.databases) {{
-          indexedDB.databases().then(dbs => dbs.forEach(db => db && db.name && indexedDB.deleteDatabase(db.name)));
-        }}
-      }} catch (e) {{}}
-
-      // Clear Cache Storage (best-effort)
-      try {{
-        if (window.caches && caches.keys) {{
-          caches.keys().then(keys => keys.forEach(k => caches.delete(k)));
-        }}
-      }} catch (e) {{}}
-
-      // Unregister service workers (best-effort)
-      try {{
-        navigator.serviceWorker?.getRegistrations?.().then(regs => regs.forEach(r => r.unregister()));
-      }} catch (e) {{}}
-
-      // Redirect back to the host app
-      window.location.replace('{redirect_url}');
-    </script>
-    """
-
-    resp = HTMLResponse(content=html, status_code=200)
+    # 2) Serve a tiny page that wipes client storage (belt-and-suspenders)
+    resp = HTMLResponse(content=_LOGOUT_HTML, status_code=200)
 
     # 3) Tell the browser to clear site data **via HTTP headers**
     # Note: Clear-Site-Data requires HTTPS (allowed on localhost).
@@ -293,22 +430,7 @@ async def logout(request: Request):
 
     # 4) Expire all auth/correlation cookies for this origin
     # Make sure these attributes (domain/path/secure/samesite) match how you originally set them.
-    is_https = _is_https(request)
-    if is_https:
-        samesite = "None"
-        secure = True
-    else:
-        samesite = "Lax"    # allows top-level navigation + same-site XHR
-        secure  = False
-    cookie_args = dict(
-        httponly=True,
-        secure=secure,
-        samesite=samesite,
-        path="/",
-        max_age=0,
-    )
-    for name in ("token", "ap_project_id", "ap_platform_id", "ap_session_born"):
-        resp.set_cookie(name, value="", **cookie_args)
+    resp.raw_headers.extend(_EXPIRE_COOKIES_HTTPS if _is_https(request) else _EXPIRE_COOKIES_HTTP)
 
     # Optional: help proxies/CDNs avoid cross-user cache bleed
     resp.headers["Vary"] = "Cookie"
@@ -318,26 +440,23 @@ async def logout(request: Request):
 
 @router.api_route("/api/v1/webhooks/{rest_of_path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"])
 async def v1_webhook_handler(request: Request, rest_of_path: str):
-    logger.info("\n✅ --- HTTP Webhook Intercepted! --- ✅")
-    from urllib.parse import parse_qsl, urlencode
     extra_qs=None
-    headers = request.headers
+    # Cookie rides along verbatim in the filtered headers; no cookie jar round-trip
+    headers, host = _filtered_outgoing_headers(request.headers)
+    headers.setdefault(b"x-forwarded-host", host)
     body = await request.body()
     if "?" in rest_of_path:
         path_only, qs = rest_of_path.split("?", 1)
         rest_of_path = path_only
         if qs:
-            extra_qs = dict(parse_qsl(qs, keep_blank_values=True))
+            extra_qs = parse_qsl(qs, keep_blank_values=True)
 
-    q_params = dict(request.query_params)  # Starlette's QueryParams -> dict
-    if extra_qs:
-        for k, v in extra_qs.items():
-            q_params.setdefault(k, v)
+    q_params = _merge_query_params(request.query_params, extra_qs)
 
-    full_url = f"{config.AP_BASE_URL.rstrip('/')}/api/v1/webhooks/{rest_of_path}"
+    full_url = f"{_AP_BASE}/api/v1/webhooks/{rest_of_path}"
     try:
-        client = _shared_httpx_client or httpx.AsyncClient(timeout=config.TIMEOUT, follow_redirects=True)
-        resp = await client.request(
+        client = _get_httpx_client()
+        upstream_req = client.build_request(
             method=request.method,
             url=full_url,
             headers=headers,
@@ -345,13 +464,11 @@ async def v1_webhook_handler(request: Request, rest_of_path: str):
             content=body,
             timeout=config.TIMEOUT
         )
+        resp = await client.send(upstream_req, stream=True)
     except httpx.RequestError as e:
         return Response(content=f"Proxy connection error on webhook: {e}", status_code=502)
 
-    # 6) Filter unsafe headers on the way back
-    excluded = {"content-encoding", "content-length", "transfer-encoding", "connection"}
-    out_headers = {k: v for k, v in resp.headers.items() if k.lower() not in excluded}
-    return Response(content=resp.content, status_code=resp.status_code, headers=out_headers)
+    return _stream_response(resp)
 
 @router.websocket("/{rest:path}")
 async def websocket_proxy(websocket: WebSocket, rest: str):
@@ -362,18 +479,15 @@ async def websocket_proxy(websocket: WebSocket, rest: str):
     await websocket.accept()
 
     # Build upstream WS URL from AP_BASE + incoming {rest} + original querystring
-    base = config.AP_BASE_URL.rstrip("/")
-    parsed = urlsplit(base)
-    scheme = "wss" if parsed.scheme == "https" else "ws"
     incoming_qs = ""
     if websocket.scope.get("query_string"):
         incoming_qs = str(websocket.scope["query_string"], "latin-1")
     upstream_path = "/" + rest.lstrip("/")
-    upstream_url = urlunsplit((scheme, parsed.netloc, upstream_path, incoming_qs, ""))
+    upstream_url = urlunsplit((_WS_SCHEME, _AP_BASE_PARTS.netloc, upstream_path, incoming_qs, ""))
 
     origin = websocket.headers.get("origin")  # preserve Origin when present
 
-    logger.info(f"WS TUNNEL: {websocket.url}  -->  {upstream_url}")
+    logger.debug("WS TUNNEL: %s  -->  %s", websocket.url, upstream_url)
     close_code = 1000
 
     try:
@@ -385,36 +499,34 @@ async def websocket_proxy(websocket: WebSocket, rest: str):
             max_size=50 * 1024 * 1024, # Cap message size at 50MB
             max_queue=32,              # Add backpressure to the queue
             ping_interval=20,          # Ensure dead connections are reaped
-            ping_timeout=20
+            ping_timeout=20,
+            compression=None           # Engine.IO frames are small; skip per-frame zlib
         ) as upstream_ws:
 
             async def pump_to_upstream():
                 try:
-                    while True:
-                        try:
-                            msg = await websocket.receive()
-                        except WebSocketDisconnect:
-                            # Browser closed; close upstream and exit
-                            try:
-                                await upstream_ws.close()
-                            except Exception:
-                                pass
-                            return
-                        except RuntimeError as e:
-                            # Starlette raises after a disconnect has been received
-                            if 'disconnect message has been received' in str(e).lower():
-                                try:
-                                    await upstream_ws.close()
-                                except Exception:
-                                    pass
-                                return
-                            raise  # other runtime errors should bubble
-
-                        if "text" in msg and msg["text"] is not None:
-                            await upstream_ws.send(msg["text"])
-                        elif "bytes" in msg and msg["bytes"] is not None:
-                            await upstream_ws.send(msg["bytes"])
+                    # receive() reports a browser close as a message and flips client_state,
+                    # so no exception (or message sniffing) is needed to notice it
+                    while websocket.client_state != WebSocketState.DISCONNECTED:
+                        msg = await websocket.receive()
+                        if msg["type"] == "websocket.disconnect":
+                            break
+
+                        # One lookup per key; Engine.IO traffic is mostly text frames
+                        text = msg.get("text")
+                        if text is not None:
+                            await upstream_ws.send(text)
+                        else:
+                            data = msg.get("bytes")
+                            if data is not None:
+                                await upstream_ws.send(data)
                         # else ignore control messages
+
+                    # Browser closed; close upstream and exit
+                    try:
+                        await upstream_ws.close()
+                    except Exception:
+                        pass
                 except Exception:
                     # swallow — outer finally will handle client close/logging
                     pass
@@ -449,7 +561,7 @@ async def websocket_proxy(websocket: WebSocket, rest: str):
                     await t
 
     except Exception as e:
-        logger.info(f"WS tunnel connect error: {e}")
+        logger.info("WS tunnel connect error: %s", e)
         close_code = 1011  # Internal Error
 
     finally:
@@ -458,7 +570,7 @@ async def websocket_proxy(websocket: WebSocket, rest: str):
                 await websocket.close(code=close_code)
             except Exception:
                 pass
-        logger.info(f"WS tunnel closed with code: {close_code}")
+        logger.debug("WS tunnel closed with code: %s", close_code)
 
 
 
@@ -475,11 +587,9 @@ async def proxy_ap_docs(request: Request, rest: str = ""):
     if qs:
         full_url = f"{full_url}?{qs}"
     try:
-        client = _shared_httpx_client or httpx.AsyncClient(timeout=config.TIMEOUT, follow_redirects=True)
+        client = _get_httpx_client()
         resp = await client.get(full_url, headers={"host": "localhost"})
-        excluded = {"content-encoding", "content-length", "transfer-encoding", "connection"}
-        out_headers = {k: v for k, v in resp.headers.items() if k.lower() not in excluded}
-        return Response(content=resp.content, status_code=resp.status_code, headers=out_headers)
+        return _relay_response(resp, resp.content)
     except httpx.RequestError as e:
         return Response(content=f"Could not reach Activepieces docs: {e}", status_code=502)
 
@@ -496,11 +606,9 @@ async def proxy_ap_openapi_json(request: Request, rest: str = ""):
     if qs:
         full_url = f"{full_url}?{qs}"
     try:
-        client = _shared_httpx_client or httpx.AsyncClient(timeout=30, follow_redirects=True)
-        resp = await client.get(full_url, headers={"host": "localhost"})
-        excluded = {"content-encoding", "content-length", "transfer-encoding", "connection"}
-        out_headers = {k: v for k, v in resp.headers.items() if k.lower() not in excluded}
-        return Response(content=resp.content, status_code=resp.status_code, headers=out_headers)
+        client = _get_httpx_client()
+        resp = await client.get(full_url, headers={"host": "localhost"}, timeout=30)
+        return _relay_response(resp, resp.content)
     except httpx.RequestError as e:
         return Response(content=f"Could not reach Activepieces OpenAPI spec: {e}", status_code=502)
 
@@ -511,10 +619,10 @@ async def proxy_static_assets(request: Request, rest: str):
     This route specifically handles requests for static assets.
     It does NOT perform authentication and simply forwards the request.
     """
-    logger.info(f"--- Asset proxy hit for: /assets/{rest} ---")
+    logger.debug("--- Asset proxy hit for: /assets/%s ---", rest)
 
-    headers = _filtered_outgoing_headers(dict(request.headers))
-    full_url = f"{config.AP_BASE_URL.rstrip('/')}/assets/{rest}"
+    headers, _ = _filtered_outgoing_headers(request.headers)
+    full_url = f"{_AP_BASE}/assets/{rest}"
     token=None
     pid=None
     auth_header = request.headers.get("Authorization")
@@ -526,59 +634,56 @@ async def proxy_static_assets(request: Request, rest: str):
         except JWTError:
             pass
     try:
-        client = _shared_httpx_client or httpx.AsyncClient(timeout=config.TIMEOUT, follow_redirects=True)
-        resp = await client.get(full_url, headers=headers)
-
-        content = url_rewrite(resp.content, resp.headers.get("Content-Type", ""), token, pid)
-        excluded = {"content-encoding", "content-length", "transfer-encoding", "connection"}
-        out_headers = {k: v for k, v in resp.headers.items() if k.lower() not in excluded}
+        client = _get_httpx_client()
+        resp = await client.send(client.build_request("GET", full_url, headers=headers), stream=True)
+    except httpx.RequestError as e:
+        return Response(content=f"Proxy connection error for asset: {e}", status_code=502)
 
-        return Response(content=content, status_code=resp.status_code, headers=out_headers)
+    # Images, fonts and other binary assets go straight through; JS/CSS are rewritten on the fly
+    content_type = _media_type(resp)
+    if not _is_rewritable(content_type, token):
+        return _stream_response(resp)
+    if not ("html" in content_type and token):
+        return _stream_response(resp, _rewrite_stream(resp.aiter_bytes(REWRITE_CHUNK_SIZE)))
 
+    try:
+        await resp.aread()
     except httpx.RequestError as e:
         return Response(content=f"Proxy connection error for asset: {e}", status_code=502)
+    finally:
+        await resp.aclose()
+    return _relay_response(resp, url_rewrite(resp.content, content_type, token, pid))
 
 
 @router.api_route("/{rest:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"])
 async def ap_proxy(request: Request, rest: str = ""):
     # --- Parse/merge any accidental query string that snuck into `rest` ---
     # FastAPI normally strips it, but hardening for safety:
-    logger.info("REST INFORMATION")
-    logger.info(rest)
     if rest == "deleteuser":
         # call the real handler directly
         return await delete_user(request)
-    from urllib.parse import parse_qsl, urlencode
     token=None
     cookie_pid=None
     cookie_platform_id=None
-    extra_qs = {}
+    extra_qs = None
     if "?" in rest:
         path_only, qs = rest.split("?", 1)
         rest = path_only
         if qs:
-            extra_qs = dict(parse_qsl(qs, keep_blank_values=True))
+            extra_qs = parse_qsl(qs, keep_blank_values=True)
 
     # --- Build base headers first (before adding Authorization) ---
-    incoming = dict(request.headers)
-    headers = _filtered_outgoing_headers(incoming)
-    headers.setdefault("X-Forwarded-Proto", request.url.scheme)
-    headers.setdefault("X-Forwarded-Host", incoming.get("host", ""))
-    headers.setdefault("X-Forwarded-For", request.client.host if request.client else "")
+    headers, host = _filtered_outgoing_headers(request.headers)
+    headers.setdefault(b"x-forwarded-proto", request.url.scheme.encode("latin-1"))
+    headers.setdefault(b"x-forwarded-host", host)
+    headers.setdefault(b"x-forwarded-for", request.client.host.encode("latin-1") if request.client else b"")
 
     # Prefer cookie token; fall back to globals (resolved atomically)
 
-    body = await request.body()
-    modified_body = body
-
     # --------------------------
     # Start with query params: merge real query with any extra_qs from rest
     # --------------------------
-    q_params = dict(request.query_params)  # Starlette's QueryParams -> dict
-    if extra_qs:
-        # merge: request.query_params has precedence; keep existing values
-        for k, v in extra_qs.items():
-            q_params.setdefault(k, v)
+    q_params = _merge_query_params(request.query_params, extra_qs)
 
     # --- NEW: Check for JWT in query parameters first ---
     token_from_query = request.query_params.get("token")
@@ -589,7 +694,7 @@ async def ap_proxy(request: Request, rest: str = ""):
         token = token_from_query
     elif auth_header and auth_header.startswith("Bearer "):
         token = auth_header.split("Bearer ")[1]
-        logger.info("--- Found JWT in Authorization header. ---")
+        logger.debug("--- Found JWT in Authorization header. ---")
     else:
         token=None
 
@@ -598,7 +703,7 @@ async def ap_proxy(request: Request, rest: str = ""):
         # sk- tokens are Activepieces platform API keys — not JWTs.
         # Pass them straight through; the upstream backend verifies them.
         if token.startswith("sk-"):
-            logger.info("--- Found Activepieces API key (sk-), bypassing JWT decode. ---")
+            logger.debug("--- Found Activepieces API key (sk-), bypassing JWT decode. ---")
         else:
             # Use .get() to handle cases where they might be missing or empty
             try:
@@ -616,104 +721,127 @@ async def ap_proxy(request: Request, rest: str = ""):
                     cookie_platform_id = platform_object.get("id")
             except JWTError as e:
                 # This handles expired tokens, invalid signatures, etc.
-                logger.info(f"JWT decoding failed: {e}")
+                logger.info("JWT decoding failed: %s", e)
                 raise HTTPException(status_code=401, detail="Invalid or expired authentication token.")
 
     if token:
-        headers["Authorization"] = f"Bearer {token}"
-
-    if modified_body != body:
-        headers["content-length"] = str(len(modified_body))
+        # Replaces any client-sent Authorization; the validated token is the only one upstream sees
+        headers[b"authorization"] = f"Bearer {token}".encode("utf-8")
+
+    # Read the body only once the token has been validated; rejected requests skip it
+    # GET bodies are never forwarded
+    if request.method == "GET":
+        body = b""
+    elif _streams_request_body(request):
+        body = request.stream()
+        # Keep the declared length so upstream does not fall back to chunked framing
+        if "content-length" in request.headers:
+            headers[b"content-length"] = request.headers["content-length"].encode("latin-1")
+    else:
+        body = await request.body()
 
 
     # Upstream is AP_BASE + normalized rest
     if rest.endswith("?"):
         rest = rest[:-1]
 
+    # Locate platform/project ids in the path with a single regex pass
+    m_plat = m_flow = m_proj = m_users = None
+    if cookie_platform_id or cookie_pid:
+        for m in PATH_ID_RE.finditer(rest):
+            if m.group("platform") is not None:
+                m_plat = m_plat or m
+            elif m.group("user_pid") is not None:
+                m_users = m_users or m
+            else:
+                if m.group("flows") and m_flow is None:
+                    m_flow = m
+                m_proj = m
+    path_edits = []
+
     if cookie_platform_id:
-        headers.setdefault("X-AP-Platform-Id", cookie_platform_id)
-        m = PLAT_SEGMENT_RE.search(rest)
-        if m:
-            path_platform_id = m.group(1)
-            if path_platform_id != cookie_platform_id:
-                s, e = m.span(1)
-                rest = rest[:s] + cookie_platform_id + rest[e:]
+        headers.setdefault(b"x-ap-platform-id", cookie_platform_id.encode("utf-8"))
+        if m_plat and m_plat.group("platform") != cookie_platform_id:
+            path_edits.append((m_plat.span("platform"), cookie_platform_id, None))
 
     # --------------------------
     # Project ID normalization (paths + query)
     # --------------------------
     if cookie_pid:
-        headers.setdefault("X-AP-Project-Id", cookie_pid)
-
-        # /projects/{pid}/flows/{fid} (replace only pid)
-        m_pf = PROJECT_FLOW_PATH_RE.search(rest)
-        if m_pf:
-            path_pid = m_pf.group("pid")
-            if path_pid != cookie_pid:
-                s, e = m_pf.span("pid")
-                rest = rest[:s] + cookie_pid + rest[e:]
-                logger.info(f"[PROJECT-ID REWRITE:PATH projects/.../flows/...] '{path_pid}' -> '{cookie_pid}' in '{rest}'")
-        else:
-            # Any /projects/{pid} (use last occurrence if multiple)
-            last = None
-            for m in PROJECT_SEGMENT_RE.finditer(rest):
-                last = m
-            if last:
-                path_pid = last.group("pid")
-                if path_pid != cookie_pid:
-                    s, e = last.span("pid")
-                    rest = rest[:s] + cookie_pid + rest[e:]
-                    logger.info(f"[PROJECT-ID REWRITE:PATH projects/...] '{path_pid}' -> '{cookie_pid}' in '{rest}'")
+        headers.setdefault(b"x-ap-project-id", cookie_pid.encode("utf-8"))
+
+        # /projects/{pid}/flows/{fid} (replace only pid), else the last /projects/{pid}
+        m_pid = m_flow or m_proj
+        if m_pid and m_pid.group("pid") != cookie_pid:
+            label = "projects/.../flows/..." if m_pid is m_flow else "projects/..."
+            path_edits.append((m_pid.span("pid"), cookie_pid, label))
 
         # /api/v1/users/projects/{pid}
-        m_up = USERS_PROJECT_RE.search(rest)
-        if m_up:
-            path_pid = m_up.group("pid")
-            if path_pid != cookie_pid:
-                s, e = m_up.span("pid")
-                rest = rest[:s] + cookie_pid + rest[e:]
-                logger.info(f"[PROJECT-ID REWRITE:PATH users/projects] '{path_pid}' -> '{cookie_pid}' in '{rest}'")
+        if m_users and m_users.group("user_pid") != cookie_pid:
+            path_edits.append((m_users.span("user_pid"), cookie_pid, "users/projects"))
 
         # Query: normalize `projectId`
-        if "projectId" in q_params and q_params["projectId"] != cookie_pid:
-            logger.info(f"[PROJECT-ID REWRITE:QUERY] '{q_params['projectId']}' -> '{cookie_pid}'")
-            q_params["projectId"] = cookie_pid
+        stale_pids = [v for k, v in q_params if k == "projectId" and v != cookie_pid]
+        if stale_pids:
+            logger.info("[PROJECT-ID REWRITE:QUERY] '%s' -> '%s'", stale_pids[0], cookie_pid)
+            q_params = [(k, cookie_pid if k == "projectId" else v) for k, v in q_params]
+
+    # Splice right-to-left so earlier spans stay valid
+    original_rest = rest
+    for (start, end), value, _ in sorted(path_edits, key=lambda edit: edit[0], reverse=True):
+        rest = rest[:start] + value + rest[end:]
+    # Log against the rewritten path, i.e. what is actually sent upstream
+    for (start, end), value, label in path_edits:
+        if label:
+            logger.info("[PROJECT-ID REWRITE:PATH %s] '%s' -> '%s' in '%s'", label, original_rest[start:end], value, rest)
 
     # Optional: upstream treats literal "NULL" poorly; drop it
-    if q_params.get("folderId") == "NULL":
-        q_params.pop("folderId", None)
-
-    full_url = f"{config.AP_BASE_URL.rstrip('/')}/{rest.lstrip('/')}"
+    if ("folderId", "NULL") in q_params:
+        q_params = [pair for pair in q_params if pair != ("folderId", "NULL")]
 
-    # Log without trailing '?' when there is no query
-    qs = urlencode(q_params, doseq=True) if q_params else ""
-    log_url = f"{full_url}{('?' + qs) if qs else ''}"
+    full_url = f"{_AP_BASE}/{rest.lstrip('/')}"
 
     # Forward (params=None avoids adding a stray '?')
     try:
-        req_session = _shared_requests_session or requests
-        resp = await asyncio.to_thread(
-            req_session.request,
+        client = _get_httpx_client()
+        upstream_req = client.build_request(
             request.method,
             full_url,
             headers=headers,
             params=(q_params or None),
-            data=modified_body,
-            allow_redirects=False,
-            timeout=config.TIMEOUT,
+            content=body,
         )
-    except requests.exceptions.RequestException as e:
+        resp = await client.send(upstream_req, stream=True, follow_redirects=False)
+    except httpx.RequestError as e:
+        return Response(content=f"Proxy connection error: {e}", status_code=502)
+
+    # Binary bodies (images, fonts, downloads) are never rewritten; pipe them through.
+    # Textual error bodies still take the buffered path below so they get logged.
+    resp_content_type = _media_type(resp)
+    if not _is_rewritable(resp_content_type, token) and not (
+        resp.status_code >= 400 and _is_textual(resp_content_type)
+    ):
+        return _stream_response(resp)
+
+    # Text bodies that only need the origin rewrite are rewritten on the fly; HTML token
+    # injection and error bodies (logged below) are still buffered.
+    if resp.status_code < 400 and not ("html" in resp_content_type and token):
+        return _stream_response(resp, _rewrite_stream(resp.aiter_bytes(REWRITE_CHUNK_SIZE)))
+
+    try:
+        await resp.aread()
+    except httpx.RequestError as e:
         return Response(content=f"Proxy connection error: {e}", status_code=502)
+    finally:
+        await resp.aclose()
 
     # Response processing
-    resp_content_type = resp.headers.get("Content-Type", "")
     if 400 <= resp.status_code < 600:
         try:
-            logger.info(f"[UPSTREAM {resp.status_code}] {rest} -> {resp.text[:500]}")
+            # Decode only the logged prefix, not the whole body
+            logger.info("[UPSTREAM %s] %s -> %s", resp.status_code, rest, resp.content[:500].decode("utf-8", "replace"))
         except Exception:
             pass
 
     rewritten_content = url_rewrite(resp.content, resp_content_type, token, cookie_pid)
-    excluded = {"content-encoding", "content-length", "transfer-encoding", "connection"}
-    out_headers = {k: v for k, v in resp.headers.items() if k.lower() not in excluded}
-    return Response(content=rewritten_content, status_code=resp.status_code, headers=out_headers)
+    return _relay_response(resp, rewritten_content)
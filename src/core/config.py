@@ -13,6 +13,8 @@ DB_USER: str = os.environ.get("AP_POSTGRES_USERNAME", "postgres")
 DB_PASSWORD: str = os.environ.get("AP_POSTGRES_PASSWORD", "abcd")
 DB_HOST: str = os.environ.get("AP_POSTGRES_HOST", "postgres")
 DB_PORT: str = os.environ.get("AP_POSTGRES_PORT", "5432")
+# Upper bound on pooled connections to the application database.
+DB_POOL_MAX: int = int(os.environ.get("AP_POSTGRES_POOL_MAX", "10"))
 
 # --- Activepieces API Configuration ---
 # The base URL for the Activepieces instance you are proxying.
@@ -26,6 +28,10 @@ CORS_ORIGINS: list = [origin.strip() for origin in CORS_ORIGINS_STR.split(',')]
 AP_FRONTEND_URL:str=os.environ.get("AP_FRONTEND_URL", "http://localhost:5000")
 AP_PROXY_URL:str=os.environ.get("AP_PROXY_URL", "http://localhost:5000")
 TIMEOUT = int(os.getenv("TIMEOUT", "1200"))
+# Uvicorn worker processes. WORKERS>1 is unsupported: db-proxy SSH tunnels and SQL
+# sessions live in per-process memory, and uvicorn's workers share one listening socket,
+# so a follow-up call can land on a worker that has never seen its session id.
+WORKERS = int(os.getenv("WORKERS", "1"))
 
 
 # --- NEW: JWT Configuration ---
@@ -1,8 +1,13 @@
+import logging
+import threading
 import psycopg2
+import psycopg2.pool
 import os
 from urllib.parse import urlparse
 from .core import config
 
+logger = logging.getLogger(__name__)
+
 class ActivepiecesDatabase:
     """Manages all database operations for the Activepieces proxy."""
 
@@ -31,6 +36,11 @@ class ActivepiecesDatabase:
                 'host': config.DB_HOST,
                 'port': config.DB_PORT
             }
+        # Created on first use so importing this module never touches the network
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        # getconn() raises instead of waiting when the pool is exhausted, so callers queue here
+        self._pool_slots = threading.BoundedSemaphore(config.DB_POOL_MAX)
 
     def _get_connection(self, dbname=None):
         """Establishes a connection to the specified database."""
@@ -63,6 +73,25 @@ class ActivepiecesDatabase:
             # Retry connection after ensuring the database exists
             return self._get_connection()
 
+    def _get_pool(self):
+        """Returns the shared connection pool for the application database, creating it once."""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    try:
+                        self._pool = psycopg2.pool.ThreadedConnectionPool(1, config.DB_POOL_MAX, **self.conn_params)
+                    except psycopg2.OperationalError:
+                        self.ensure_database_exists()
+                        self._pool = psycopg2.pool.ThreadedConnectionPool(1, config.DB_POOL_MAX, **self.conn_params)
+        return self._pool
+
+    def close_pool(self):
+        """Closes every pooled connection."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+
     def setup_database(self):
         """Creates the UserInfo table if it doesn't already exist."""
         conn = self.get_db_connection()
@@ -85,27 +114,29 @@ class ActivepiecesDatabase:
 
     def store_user_data(self, user_data: dict):
         """Inserts a new user or updates an existing user's data based on email."""
-        conn = self.get_db_connection()
+        self._pool_slots.acquire()
+        try:
+            pool = self._get_pool()
+            conn = pool.getconn()
+        except Exception:
+            self._pool_slots.release()
+            raise
         try:
             with conn.cursor() as cur:
-                cur.execute("SELECT email FROM UserInfo WHERE email = %s", (user_data["email"],))
-                user_exists = cur.fetchone()
-
-                if user_exists:
-                    cur.execute("""
-                        UPDATE UserInfo
-                        SET user_id = %s, first_name = %s, last_name = %s, auth_token = %s, project_id = %s, platform_id = %s
-                        WHERE email = %s
-                    """, (user_data["id"], user_data.get("firstName"), user_data.get("lastName"), user_data["token"], user_data["projectId"], user_data["platformId"], user_data["email"]))
-                else:
-                    cur.execute("""
-                        INSERT INTO UserInfo (user_id, email, first_name, last_name, auth_token, project_id, platform_id)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    """, (user_data["id"], user_data["email"], user_data.get("firstName"), user_data.get("lastName"), user_data["token"], user_data["projectId"], user_data["platformId"]))
+                # One round-trip upsert keyed on the UNIQUE email column
+                cur.execute("""
+                    INSERT INTO UserInfo (user_id, email, first_name, last_name, auth_token, project_id, platform_id)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (email) DO UPDATE
+                    SET user_id = EXCLUDED.user_id, first_name = EXCLUDED.first_name, last_name = EXCLUDED.last_name,
+                        auth_token = EXCLUDED.auth_token, project_id = EXCLUDED.project_id, platform_id = EXCLUDED.platform_id
+                """, (user_data["id"], user_data["email"], user_data.get("firstName"), user_data.get("lastName"), user_data["token"], user_data["projectId"], user_data["platformId"]))
             conn.commit()
         except Exception as e:
             conn.rollback()
-            print(f"Database operation failed: {e}")
+            logger.error("Database operation failed: %s", e)
             raise
         finally:
-            conn.close()
+            # Broken connections are dropped instead of going back into the pool
+            pool.putconn(conn, close=bool(conn.closed))
+            self._pool_slots.release()
@@ -1,9 +1,13 @@
+import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .api import proxy_routes, shhconnect_routes
 from .database import ActivepiecesDatabase
 from .core import config
 from .database_management import db_manager
+from .services import activepieces_service
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI()
 
@@ -25,4 +29,9 @@ app.include_router(proxy_routes.router)
 async def startup_event():
     db_manager.ensure_database_exists()
     db_manager.setup_database()
-    print("Database setup complete.")
+    logger.info("Database setup complete.")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    db_manager.close_pool()
+    await activepieces_service.aclose()
@@ -1,13 +1,34 @@
 import os
-import requests
+import asyncio
+import logging
+from typing import Optional
+
+import httpx
 from ..core import config
+
+logger = logging.getLogger(__name__)
 # --- Configuration ---
 # This service is responsible for knowing the details of the Activepieces API.
 
-# Use a single session to pool connections to the backend
-_session = requests.Session()
+# Single async client so every backend call shares one connection pool
+_async_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    global _async_client
+    if _async_client is None:
+        _async_client = httpx.AsyncClient(timeout=config.TIMEOUT)
+    return _async_client
+
+
+async def aclose() -> None:
+    """Closes the shared async client, if one was created."""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
 
-def sign_up(email: str, password: str, first_name: str, last_name: str) -> dict:
+async def sign_up(email: str, password: str, first_name: str, last_name: str) -> dict:
     """
     Sends a sign-up request to the Activepieces API.
 
@@ -21,7 +42,7 @@ def sign_up(email: str, password: str, first_name: str, last_name: str) -> dict:
         A dictionary containing the API response data.
 
     Raises:
-        requests.exceptions.HTTPError: If the API returns an error status code.
+        httpx.HTTPStatusError: If the API returns an error status code.
     """
 
     url = f"{config.AP_BASE_URL}/api/v1/authentication/sign-up"
@@ -33,12 +54,12 @@ def sign_up(email: str, password: str, first_name: str, last_name: str) -> dict:
         "trackEvents": True,
         "newsLetter": False,
     }
-    response = _session.post(url, json=payload, timeout=config.TIMEOUT)
+    response = await _get_async_client().post(url, json=payload)
     response.raise_for_status()  # Raise an exception for 4xx or 5xx status codes
     return response.json()
 
 
-def sign_in(email: str, password: str) -> dict:
+async def sign_in(email: str, password: str) -> dict:
     """
     Sends a sign-in request to the Activepieces API.
 
@@ -50,11 +71,11 @@ def sign_in(email: str, password: str) -> dict:
         A dictionary containing the API response data.
 
     Raises:
-        requests.exceptions.HTTPError: If the API returns an error status code.
+        httpx.HTTPStatusError: If the API returns an error status code.
     """
     url = f"{config.AP_BASE_URL}/api/v1/authentication/sign-in"
     payload = {"email": email, "password": password}
-    response = _session.post(url, json=payload, timeout=config.TIMEOUT)
+    response = await _get_async_client().post(url, json=payload)
     response.raise_for_status()
     return response.json()
 from typing import List, Dict
@@ -63,8 +84,10 @@ from ..core import config  # adjust import
 BASE = config.AP_BASE_URL.rstrip('/')
 USE_API_PREFIX = True  # set False if you hit Fastify directly
 API = f"{BASE}/api" if USE_API_PREFIX else BASE
+# Upper bound on concurrent project deletions while purging a user
+PURGE_CONCURRENCY = 10
 
-def list_projects(service_token: str, limit: int = 50) -> List[Dict]:
+async def list_projects(service_token: str, limit: int = 50) -> List[Dict]:
     url = f"{API}/v1/projects"
     headers = {"Authorization": f"Bearer {service_token}", "Accept": "application/json"}
 
@@ -77,7 +100,7 @@ def list_projects(service_token: str, limit: int = 50) -> List[Dict]:
         if cursor:
             params["cursor"] = cursor
 
-        resp = _session.get(url, headers=headers, params=params, timeout=10)
+        resp = await _get_async_client().get(url, headers=headers, params=params, timeout=10)
         resp.raise_for_status()
         page = resp.json()
 
@@ -95,13 +118,12 @@ def list_projects(service_token: str, limit: int = 50) -> List[Dict]:
 
     return projects
 
-def delete_project(project_id: str, service_token: str) -> None:
+async def delete_project(project_id: str, service_token: str) -> None:
     url = f"{API}/v1/projects/{project_id}"
     headers = {"Authorization": f"Bearer {service_token}", "Accept": "application/json"}
 
-    print(f"[delete_project] DELETE {url}")
-    r = _session.delete(url, headers=headers, timeout=10)
-    print(f"[delete_project] status={r.status_code} body={r.text!r}")
+    r = await _get_async_client().delete(url, headers=headers, timeout=10)
+    logger.debug("[delete_project] DELETE %s status=%s", url, r.status_code)
 
     # Only treat 204 as success
     if r.status_code == 204:
@@ -123,30 +145,32 @@ def delete_project(project_id: str, service_token: str) -> None:
 
 
 
-def delete_user(user_id: str, service_token: str) -> None:
+async def delete_user(user_id: str, service_token: str) -> None:
     url = f"{API}/v1/users/{user_id}"
     headers = {"Authorization": f"Bearer {service_token}", "Accept": "application/json"}
-    resp = _session.delete(url, headers=headers, timeout=30)
+    resp = await _get_async_client().delete(url, headers=headers, timeout=30)
     if resp.status_code == 404:
         return
     resp.raise_for_status()
 
-def purge_user(user_id: str, service_token: str) -> None:
-    projects = list_projects(service_token)
-    print("**********************************************")
-    print(str(user_id))
-    print(projects)
-    print("**********************************************")
-    for proj in projects:
-        print("**********************************************")
-        print(proj.get("ownerId"))
-        print("**********************************************")
-        if proj.get("ownerId") == user_id:
-            print("###################################")
-            print("User id")
-            print(user_id)
-            print("Project id")
-            print(proj["id"])
-            delete_project(proj["id"], service_token)
-
-    delete_user(user_id, service_token)
+async def purge_user(user_id: str, service_token: str) -> None:
+    projects = await list_projects(service_token)
+    limiter = asyncio.Semaphore(PURGE_CONCURRENCY)
+
+    async def _delete_owned(project_id: str) -> None:
+        async with limiter:
+            logger.debug("[purge_user] deleting project %s owned by %s", project_id, user_id)
+            await delete_project(project_id, service_token)
+
+    owned = [proj["id"] for proj in projects if proj.get("ownerId") == user_id]
+    # Let every delete finish before reporting, so nothing is still in flight when the route replies
+    results = await asyncio.gather(*(_delete_owned(pid) for pid in owned), return_exceptions=True)
+    first_error = None
+    for project_id, result in zip(owned, results):
+        if isinstance(result, BaseException):
+            logger.error("[purge_user] deleting project %s failed: %s", project_id, result)
+            first_error = first_error or result
+    if first_error is not None:
+        raise first_error
+
+    await delete_user(user_id, service_token)
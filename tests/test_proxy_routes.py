@@ -0,0 +1,51 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api import proxy_routes
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Route the proxy's shared client to a MockTransport and record what it sends."""
+    sent = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(request)
+        return httpx.Response(200, json={})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(proxy_routes, "_shared_httpx_client", client)
+    return sent
+
+
+@pytest.fixture
+def proxy_client():
+    app = FastAPI()
+    app.include_router(proxy_routes.router)
+    # No context manager: the router's startup/shutdown hooks would replace the mock client
+    return TestClient(app)
+
+
+def test_query_token_replaces_client_authorization(upstream, proxy_client):
+    # sk- API keys skip JWT decoding, so no signing secret is needed here
+    resp = proxy_client.get(
+        "/api/v1/flows",
+        params={"token": "sk-proxy"},
+        headers={"Authorization": "Bearer client-token", "X-Forwarded-For": "10.0.0.1"},
+    )
+
+    assert resp.status_code == 200
+    sent_headers = upstream[0].headers
+    assert sent_headers.get_list("authorization") == ["Bearer sk-proxy"]
+    assert sent_headers.get_list("x-forwarded-for") == ["10.0.0.1"]
+
+
+def test_non_ascii_header_values_pass_through(upstream, proxy_client):
+    cookie = "name=é".encode("utf-8")
+
+    resp = proxy_client.get("/api/v1/flows", headers=[(b"cookie", cookie)])
+
+    assert resp.status_code == 200
+    assert upstream[0].headers.raw.count((b"cookie", cookie)) == 1